@@ -1,5 +1,20 @@
-from typing import Any, Dict
+import asyncio
+from typing import Any, Dict, List
 
 class AgentBase:
+    # set to False for agents whose output can change for the same inputs
+    memoize: bool = True
+    # set to True to have concurrent calls coalesced into run_batch
+    batchable: bool = False
+    batch_size: int = 16
+    batch_wait: float = 0.01
+
     async def run(self, inputs: Dict[str, Any]) -> Dict[str, Any]:
         raise NotImplementedError
+
+    async def run_batch(self, inputs_list: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        # one bad input must not fail the other requests in the batch
+        return await asyncio.gather(
+            *(self.run(inputs) for inputs in inputs_list),
+            return_exceptions=True
+        )
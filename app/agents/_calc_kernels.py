@@ -0,0 +1,36 @@
+import numpy as np
+from numba import njit
+
+OP_ADD = 0
+OP_MULTIPLY = 1
+OP_SUBTRACT = 2
+OP_DIVIDE = 3
+
+OPCODES = {
+    'add': OP_ADD,
+    'multiply': OP_MULTIPLY,
+    'subtract': OP_SUBTRACT,
+    'divide': OP_DIVIDE,
+}
+
+@njit(cache=True)
+def reduce(op: int, a: np.ndarray) -> float:
+    if op == OP_ADD:
+        result = 0.0
+        for i in range(a.shape[0]):
+            result += a[i]
+        return result
+    result = a[0]
+    if op == OP_MULTIPLY:
+        for i in range(1, a.shape[0]):
+            result *= a[i]
+    elif op == OP_SUBTRACT:
+        for i in range(1, a.shape[0]):
+            result -= a[i]
+    elif op == OP_DIVIDE:
+        for i in range(1, a.shape[0]):
+            result /= a[i]
+    return result
+
+# compile once at import so the first workflow does not pay the JIT cost
+reduce(OP_ADD, np.zeros(1, dtype=np.float64))
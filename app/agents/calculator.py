@@ -1,5 +1,30 @@
+import operator
+from functools import reduce
+import numpy as np
 from ..agent_base import AgentBase
-from typing import Dict, Any, List, Union
+from ._calc_kernels import OPCODES, OP_DIVIDE, reduce as kernel_reduce
+from typing import Dict, Any, List, Optional, Union
+
+# below this many values the numpy conversion costs more than it saves
+VECTORIZE_THRESHOLD = 32
+
+# largest magnitude at which every int is exactly representable as a float64
+_MAX_EXACT_INT = 2 ** 53
+
+def _divide(values: List[Union[int, float]]) -> float:
+    if 0 in values[1:]:
+        raise ValueError("Division by zero")
+    return reduce(operator.truediv, values)
+
+_OPS = {
+    'add': sum,
+    'multiply': lambda values: reduce(operator.mul, values, 1),
+    'subtract': lambda values: reduce(operator.sub, values),
+    'divide': _divide,
+}
+
+# operations that return 0 when given fewer values than this
+_MIN_VALUES = {'subtract': 2, 'divide': 2}
 
 class Calculator(AgentBase):
     async def run(self, inputs):
@@ -10,15 +35,13 @@ class Calculator(AgentBase):
             if not operation or not isinstance(values, list):
                 return {'error': 'Missing or invalid operation/values'}
 
-            resolved_values = []
-            for v in values:
-                if isinstance(v, str) and v in inputs:
-                    if isinstance(inputs[v], dict) and 'result' in inputs[v]:
-                        resolved_values.append(inputs[v]['result'])
-                    else:
-                        resolved_values.append(inputs[v])
-                else:
-                    resolved_values.append(v)
+            # string values name other inputs; unwrap {'result': ...} payloads
+            inputs_get = inputs.get
+            resolved_values = [
+                (r['result'] if isinstance(r := inputs_get(v, v), dict) and 'result' in r else r)
+                if isinstance(v, str) else v
+                for v in values
+            ]
 
             result = self._calculate(operation, resolved_values)
             return {'result': result}
@@ -30,30 +53,46 @@ class Calculator(AgentBase):
         if not values:
             return 0
 
-        if operation == 'add':
-            return sum(values)
-        elif operation == 'multiply':
-            result = 1
-            for v in values:
-                result *= v
-            return result
-        elif operation == 'subtract':
-            if len(values) < 2:
-                return 0
-            result = values[0]
-            for v in values[1:]:
-                result -= v
-            return result
-        elif operation == 'divide':
-            if len(values) < 2:
-                return 0
-            result = values[0]
-            for v in values[1:]:
-                if v == 0:
-                    raise ValueError("Division by zero")
-                result /= v
-            return result
-        else:
+        if len(values) >= VECTORIZE_THRESHOLD:
+            arr = self._as_exact_float_array(operation, values)
+            if arr is not None:
+                result = self._calculate_vectorized(operation, arr)
+                if arr.dtype == np.int64 and operation != 'divide':
+                    return int(result)
+                return result
+
+        op = _OPS.get(operation)
+        if op is None:
+            raise ValueError(f"Unsupported operation: {operation}")
+        if len(values) < _MIN_VALUES.get(operation, 1):
+            return 0
+        return op(values)
+
+    def _as_exact_float_array(self, operation: str, values: List[Union[int, float]]) -> Optional[np.ndarray]:
+        # the kernel reduces left to right in float64, like _OPS does, so it is only used where
+        # that gives the same answer: float lists, and int lists whose results stay exact
+        types = set(map(type, values))
+        if types == {float}:
+            # sum() compensates rounding error on 3.12+, the kernel does not
+            if operation == 'add':
+                return None
+            return np.asarray(values, dtype=np.float64)
+        if types != {int} or operation == 'multiply':
+            return None
+        arr = np.asarray(values)
+        if arr.dtype != np.int64:
+            return None
+        bound = _MAX_EXACT_INT if operation == 'divide' else _MAX_EXACT_INT // len(values)
+        if arr.max() > bound or arr.min() < -bound:
+            return None
+        return arr
+
+    def _calculate_vectorized(self, operation: str, arr: np.ndarray) -> float:
+        op = OPCODES.get(operation)
+        if op is None:
             raise ValueError(f"Unsupported operation: {operation}")
+        if op == OP_DIVIDE and np.any(arr[1:] == 0):
+            raise ValueError("Division by zero")
+        return float(kernel_reduce(op, arr.astype(np.float64, copy=False)))
 
 agent = Calculator()
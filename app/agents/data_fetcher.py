@@ -1,16 +1,67 @@
+import asyncio
 import httpx
+from typing import Optional
 from ..agent_base import AgentBase
 
 class DataFetcher(AgentBase):
+    memoize = False
+
+    def __init__(self, client: Optional[httpx.AsyncClient] = None):
+        self.client = client
+
     async def run(self, inputs):
         url = inputs.get('url')
-        if not url:
+        urls = inputs.get('urls')
+        max_bytes = inputs.get('max_bytes')
+        if not url and not urls:
             return {'error': 'missing url'}
-        async with httpx.AsyncClient(timeout=10) as client:
-            r = await client.get(url)
-            return {
-                'status_code': r.status_code,
-                'operation': r.text.strip(),
-            }
+        if urls and not isinstance(urls, list):
+            return {'error': 'urls must be a list'}
+        if self.client is None:
+            # no shared client outside the app's startup hook; use one for this call
+            async with httpx.AsyncClient(timeout=10) as client:
+                return await self._run(client, url, urls, max_bytes)
+        return await self._run(self.client, url, urls, max_bytes)
+
+    async def _run(self, client, url, urls, max_bytes):
+        if urls:
+            return await self._fetch_many(client, urls, max_bytes)
+        status_code, text = await self._fetch(client, url, max_bytes)
+        return {
+            'status_code': status_code,
+            'operation': text,
+        }
+
+    async def _fetch(self, client, url, max_bytes=None):
+        # stream the body so oversized responses are rejected before being fully buffered
+        async with client.stream('GET', url) as r:
+            body = bytearray()
+            async for chunk in r.aiter_bytes():
+                body += chunk
+                if max_bytes is not None and len(body) > max_bytes:
+                    raise ValueError(f"Response from {url} exceeds {max_bytes} bytes")
+            return r.status_code, body.decode(r.encoding or 'utf-8', errors='replace').strip()
+
+    async def _fetch_many(self, client, urls, max_bytes=None):
+        # concurrency is bounded by the client's connection pool limits
+        responses = await asyncio.gather(
+            *(self._fetch(client, u, max_bytes) for u in urls),
+            return_exceptions=True
+        )
+        status_codes, texts, errors = [], [], []
+        for r in responses:
+            if isinstance(r, Exception):
+                status_codes.append(None)
+                texts.append(None)
+                errors.append(str(r))
+            else:
+                status_codes.append(r[0])
+                texts.append(r[1])
+                errors.append(None)
+        return {
+            'status_codes': status_codes,
+            'texts': texts,
+            'errors': errors,
+        }
 
 agent = DataFetcher()
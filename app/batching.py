@@ -0,0 +1,59 @@
+import asyncio
+from typing import Any, Awaitable, Callable, List, Optional, Set, Tuple
+
+class AsyncBatchEngine:
+
+    def __init__(
+        self,
+        processing_function: Callable[[List[Any]], Awaitable[List[Any]]],
+        batch_size: int = 16,
+        wait_timeout: float = 0.01
+    ):
+        self.processing_function = processing_function
+        self.batch_size = batch_size
+        self.wait_timeout = wait_timeout
+        self._batch: List[Tuple[Any, asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks: Set[asyncio.Task] = set()
+
+    async def add_request(self, item: Any) -> Any:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._batch.append((item, future))
+        if len(self._batch) >= self.batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.wait_timeout, self._flush)
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._batch = self._batch, []
+        # callers that timed out while queued no longer need a result
+        batch = [(item, future) for item, future in batch if not future.done()]
+        if not batch:
+            return
+        task = asyncio.create_task(self._process(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _process(self, batch: List[Tuple[Any, asyncio.Future]]):
+        try:
+            results = await self.processing_function([item for item, _ in batch])
+            if len(results) != len(batch):
+                raise ValueError(f"Batch returned {len(results)} results for {len(batch)} requests")
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        # run_batch may return an exception in place of a result to fail just that request
+        for (_, future), result in zip(batch, results):
+            if future.done():
+                continue
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
@@ -1,6 +1,7 @@
-from fastapi import FastAPI, UploadFile, HTTPException
+from fastapi import FastAPI, UploadFile, HTTPException, Query
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from fastapi.responses import JSONResponse, ORJSONResponse
+from pydantic import BaseModel, TypeAdapter
 from typing import List, Dict, Any, Optional
 from .orchestrator import Orchestrator
 from .storage import InMemoryStorage
@@ -8,9 +9,21 @@ from .agents import data_fetcher, calculator
 from .agent_base import AgentBase
 import importlib.util
 import asyncio
-import uuid
+from collections import OrderedDict
+import hashlib
+import secrets
+import types
+import httpx
 
-app = FastAPI()
+class _ORJSONResponse(ORJSONResponse):
+    def render(self, content: Any) -> bytes:
+        try:
+            return super().render(content)
+        except TypeError:
+            # orjson rejects ints wider than 64 bits, which Calculator results can be
+            return JSONResponse.render(self, content)
+
+app = FastAPI(default_response_class=_ORJSONResponse)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -21,11 +34,41 @@ app.add_middleware(
 
 storage = InMemoryStorage()
 
+# compiled uploads keyed by (name, content hash); the name is part of the key because
+# it is baked into the code object's filename
+AGENT_CODE_CACHE_SIZE = 64
+_agent_code_cache: OrderedDict = OrderedDict()
+
 agents = {
     "data_fetcher": data_fetcher.agent,
     "calculator": calculator.agent,
 }
 
+orchestrator = Orchestrator(
+    max_concurrent=3,
+    max_retries=2,
+    timeout=30
+)
+for agent_name, agent in agents.items():
+    orchestrator.register_agent(agent_name, agent)
+
+@app.on_event("startup")
+async def startup():
+    # eager tasks run until their first real suspension without a loop round trip (3.12+)
+    if hasattr(asyncio, 'eager_task_factory'):
+        asyncio.get_running_loop().set_task_factory(asyncio.eager_task_factory)
+    app.state.http = httpx.AsyncClient(
+        timeout=10,
+        http2=True,
+        limits=httpx.Limits(max_connections=200, max_keepalive_connections=100, keepalive_expiry=60)
+    )
+    data_fetcher.agent.client = app.state.http
+
+@app.on_event("shutdown")
+async def shutdown():
+    data_fetcher.agent.client = None
+    await app.state.http.aclose()
+
 @app.get("/agents/list")
 async def list_agents():
     return {name: type(agent).__name__ for name, agent in agents.items()}
@@ -37,14 +80,23 @@ async def register_agent(
 ):
     try:
         code = await python_file.read()
-        code = code.decode('utf-8')
+        cache_key = (name, hashlib.blake2b(code).digest())
+        code_obj = _agent_code_cache.get(cache_key)
+        if code_obj is None:
+            code_obj = compile(code.decode('utf-8'), f"<agent:{name}>", 'exec')
         module_name = f"dynamic_agent_{name.lower()}"
         spec = importlib.util.spec_from_loader(module_name, loader=None)
         module = importlib.util.module_from_spec(spec)
-        exec(code, module.__dict__)
+        exec(code_obj, module.__dict__)
         if not hasattr(module, 'agent') or not isinstance(module.agent, AgentBase):
             raise ValueError("Code must define an 'agent' variable that is an instance of AgentBase")
+        # only code that produced a valid agent is kept
+        _agent_code_cache[cache_key] = code_obj
+        _agent_code_cache.move_to_end(cache_key)
+        if len(_agent_code_cache) > AGENT_CODE_CACHE_SIZE:
+            _agent_code_cache.popitem(last=False)
         agents[name] = module.agent
+        orchestrator.register_agent(name, module.agent, replace=True)
         return {"status": "success", "message": f"Agent '{name}' registered successfully"}
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -53,6 +105,7 @@ class Node(BaseModel):
     id: str
     agent: str
     params: Dict[str, Any] = {}
+    memoize: bool = True
 
 class Edge(BaseModel):
     from_: str
@@ -62,6 +115,10 @@ class RunRequest(BaseModel):
     nodes: List[Node]
     edges: List[Edge]
     initial_inputs: Dict[str, Any] = {}
+    fail_fast: bool = False
+
+_nodes_adapter = TypeAdapter(List[Node])
+_edges_adapter = TypeAdapter(List[Edge])
 
 class RunStatus(BaseModel):
     run_id: str
@@ -72,10 +129,10 @@ class RunStatus(BaseModel):
     updated_at: Optional[float] = None
 
 
-async def execute_workflow(run_id: str, nodes: List[Node], edges: List[Edge], initial_inputs: Dict[str, Any]):
+async def execute_workflow(run_id: str, nodes: List[Node], edges: List[Edge], initial_inputs: Dict[str, Any], fail_fast: bool = False):
     try:
-        nodes_dict = [node.model_dump() for node in nodes]
-        edges_dict = [edge.model_dump() for edge in edges]
+        nodes_dict = _nodes_adapter.dump_python(nodes)
+        edges_dict = _edges_adapter.dump_python(edges)
         await storage.create_run(
             run_id=run_id,
             spec={
@@ -84,17 +141,11 @@ async def execute_workflow(run_id: str, nodes: List[Node], edges: List[Edge], in
                 'initial_inputs': initial_inputs
             }
         )
-        orchestrator = Orchestrator(
-            max_concurrent=3,
-            max_retries=2,
-            timeout=30
-        )
-        for agent_name, agent in agents.items():
-            orchestrator.register_agent(agent_name, agent)
         results = await orchestrator.run(
             nodes=nodes_dict,
             edges=edges_dict,
-            initial_inputs=initial_inputs
+            initial_inputs=initial_inputs,
+            fail_fast=fail_fast
         )
         for node_id, result in results.items():
             await storage.set_node_result(run_id, node_id, result)
@@ -107,13 +158,14 @@ async def execute_workflow(run_id: str, nodes: List[Node], edges: List[Edge], in
 
 @app.post("/runs", response_model=dict)
 async def create_run(run_request: RunRequest):
-    run_id = str(uuid.uuid4())
+    run_id = secrets.token_hex(16)
     asyncio.create_task(
         execute_workflow(
             run_id=run_id,
             nodes=run_request.nodes,
             edges=run_request.edges,
-            initial_inputs=run_request.initial_inputs
+            initial_inputs=run_request.initial_inputs,
+            fail_fast=run_request.fail_fast
         )
     )
     return {
@@ -131,6 +183,19 @@ async def get_run(run_id: str):
     run = await storage.get_run(run_id)
     if not run:
         raise HTTPException(status_code=404, detail="Run not found")
+    return _run_status(run_id, run)
+
+# upper bound on how long a watch request may hold its connection open
+MAX_WATCH_TIMEOUT = 60
+
+@app.get("/runs/{run_id}/watch", response_model=RunStatus)
+async def watch_run(run_id: str, timeout: float = Query(30, ge=0, le=MAX_WATCH_TIMEOUT)):
+    run = await storage.wait_until_done(run_id, timeout=timeout)
+    if not run:
+        raise HTTPException(status_code=404, detail="Run not found")
+    return _run_status(run_id, run)
+
+def _run_status(run_id: str, run: Dict[str, Any]) -> RunStatus:
     return RunStatus(
         run_id=run_id,
         status=run.get('status', 'UNKNOWN'),
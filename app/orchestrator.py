@@ -1,8 +1,16 @@
 import asyncio
-import traceback
-from typing import Dict, Any, List, Optional, Set
-from dataclasses import dataclass
+import copy
+import hashlib
+import json
+import logging
+import time
+from collections import ChainMap, OrderedDict
+from typing import Callable, Dict, Any, FrozenSet, List, Optional, Set
+from dataclasses import dataclass, field
 from enum import Enum
+from .batching import AsyncBatchEngine
+
+logger = logging.getLogger(__name__)
 
 class NodeStatus(Enum):
     PENDING = "PENDING"
@@ -10,27 +18,63 @@ class NodeStatus(Enum):
     COMPLETED = "COMPLETED"
     FAILED = "FAILED"
 
-@dataclass
+# NodeExecution stores the plain strings so status updates skip the Enum machinery
+STATUS_PENDING = NodeStatus.PENDING.value
+STATUS_RUNNING = NodeStatus.RUNNING.value
+STATUS_COMPLETED = NodeStatus.COMPLETED.value
+STATUS_FAILED = NodeStatus.FAILED.value
+
+@dataclass(slots=True)
 class NodeExecution:
     id: str
-    status: NodeStatus = NodeStatus.PENDING
+    status: str = STATUS_PENDING
     result: Any = None
     error: Optional[str] = None
     retries: int = 0
-    depends_on: Set[str] = None
+    depends_on: FrozenSet[str] = field(default_factory=frozenset)
+
+class _FailFast(Exception):
+    pass
+
+@dataclass
+class RunContext:
+    node_map: Dict[str, Dict]
+    initial_inputs: Dict[str, Any]
+    fail_fast: bool = False
+    executions: Dict[str, NodeExecution] = field(default_factory=dict)
+    successors: Dict[str, List[str]] = field(default_factory=dict)
+    in_degree: Dict[str, int] = field(default_factory=dict)
+    ready: asyncio.Queue = field(default_factory=asyncio.Queue)
+    results: Dict[str, Any] = field(default_factory=dict)
+    completed: Set[str] = field(default_factory=set)
+    remaining: int = 0
+    active: int = 0
+    workers: int = 0
+    deadlocked: bool = False
 
 class AgentWrapper:
 
     def __init__(self, name: str, agent_instance):
         self.name = name
         self.agent = agent_instance
+        self.batch_engine = None
+        if getattr(agent_instance, 'batchable', False):
+            self.batch_engine = AsyncBatchEngine(
+                processing_function=agent_instance.run_batch,
+                batch_size=agent_instance.batch_size,
+                wait_timeout=agent_instance.batch_wait
+            )
 
     async def run(self, input_data: Dict[str, Any], timeout: Optional[float] = 30.0) -> Any:
         try:
-            result = await asyncio.wait_for(
-                self.agent.run(inputs=input_data),
-                timeout=timeout
-            )
+            if self.batch_engine is not None:
+                call = self.batch_engine.add_request(input_data)
+            else:
+                call = self.agent.run(inputs=input_data)
+            if timeout is None:
+                # no timer handle to schedule and cancel when timeouts are disabled
+                return await call
+            result = await asyncio.wait_for(call, timeout=timeout)
             return result
 
         except asyncio.TimeoutError:
@@ -38,90 +82,176 @@ class AgentWrapper:
             raise Exception(error_msg)
         except Exception as e:
             error_msg = f"Agent {self.name} failed: {str(e)}"
-            traceback.print_exc()
-            raise Exception(error_msg)
+            logger.debug("Agent %s failed", self.name, exc_info=True)
+            raise Exception(error_msg) from e
 
 class Orchestrator:
 
-    def __init__(self, max_concurrent: int = 3, max_retries: int = 2, timeout: int = 30):
+    def __init__(
+        self,
+        max_concurrent: int = 3,
+        max_retries: int = 2,
+        timeout: Optional[float] = 30,
+        memo_size: int = 1024,
+        fail_fast: bool = False,
+        retry_backoff: float = 0.1,
+        profile: Optional[Callable[[str, str, float], None]] = None
+    ):
         self.agents: Dict[str, Agent] = {}
-        self.executions: Dict[str, NodeExecution] = {}
+        self.max_concurrent = max_concurrent
         self.max_retries = max_retries
         self.timeout = timeout
+        self.fail_fast = fail_fast
+        self.retry_backoff = retry_backoff
+        self.memo_size = memo_size
+        self._memo: OrderedDict = OrderedDict()
+        # called with (node_id, agent_type, seconds) after each agent call; off by default
+        self._profile = profile
 
-    def register_agent(self, name: str, agent_instance):
+    def register_agent(self, name: str, agent_instance, replace: bool = False):
         if name in self.agents:
-            raise Exception(f"Agent {name} already exists")
+            if not replace:
+                raise Exception(f"Agent {name} already exists")
+            # memo keys only carry the agent name, so the old agent's results must go
+            for key in [key for key in self._memo if key[0] == name]:
+                del self._memo[key]
         self.agents[name] = AgentWrapper(name, agent_instance)
 
-    async def run(self, nodes: List[Dict], edges: List[Dict], initial_inputs: Dict[str, Any]) -> Dict[str, Any]:
-        node_map = {node['id']: node for node in nodes}
+    def clear_memo(self):
+        self._memo.clear()
+
+    def _memo_key(self, agent_type: str, input_data: ChainMap) -> Optional[tuple]:
+        try:
+            payload = json.dumps(input_data.maps, sort_keys=True, default=str).encode()
+        except (TypeError, ValueError):
+            return None
+        return (agent_type, hashlib.blake2b(payload, digest_size=16).digest())
+
+    async def run(self, nodes: List[Dict], edges: List[Dict], initial_inputs: Dict[str, Any], fail_fast: Optional[bool] = None) -> Dict[str, Any]:
+        ctx = RunContext(
+            node_map={node['id']: node for node in nodes},
+            initial_inputs=initial_inputs,
+            fail_fast=self.fail_fast if fail_fast is None else fail_fast
+        )
+
+        depends_on: Dict[str, Set[str]] = {node['id']: set() for node in nodes}
+        for edge in edges:
+            if edge['to'] in depends_on:
+                depends_on[edge['to']].add(edge['from_'])
 
-        for node in nodes:
-            node_id = node['id']
-            depends_on = set()
-            for edge in edges:
-                if edge['to'] == node_id:
-                    depends_on.add(edge['from_'])
-            self.executions[node_id] = NodeExecution(
+        for node_id, deps in depends_on.items():
+            ctx.executions[node_id] = NodeExecution(
                 id=node_id,
-                depends_on=depends_on
+                depends_on=frozenset(deps)
             )
+            ctx.in_degree[node_id] = len(deps)
+            for dep_id in deps:
+                ctx.successors.setdefault(dep_id, []).append(node_id)
+            if not deps:
+                ctx.ready.put_nowait(node_id)
 
-        pending = set(node['id'] for node in nodes)
-        completed = set()
-        results = {}
-
-        while pending:
-            runnable = []
-            for node_id in pending:
-                deps = self.executions[node_id].depends_on
-                if deps.issubset(completed):
-                    runnable.append(node_id)
-            if not runnable and pending:
-                blocked = []
-                for node_id in pending:
-                    missing_deps = self.executions[node_id].depends_on - completed
-                    if missing_deps:
-                        blocked.append((node_id, missing_deps))
-                error_msg = "\nDeadlock in dependency graph. Blocked nodes:\n"
-                for node_id, deps in blocked:
-                    error_msg += f"- {node_id}: waiting for {deps}\n"
-                raise Exception(error_msg)
-
-            tasks = []
-            for node_id in runnable:
-                task = asyncio.create_task(
-                    self._execute_node(node_id, node_map[node_id], initial_inputs, results)
-                )
-                tasks.append((node_id, task))
-            for node_id, task in tasks:
-                try:
-                    result = await task
-                    results[node_id] = result
-                    completed.add(node_id)
-                    pending.remove(node_id)
-                except Exception as e:
-                    completed.add(node_id)
-                    pending.remove(node_id)
+        ctx.remaining = len(depends_on)
+        if ctx.remaining and ctx.ready.empty():
+            ctx.deadlocked = True
+        elif ctx.remaining:
+            ctx.workers = min(self.max_concurrent, ctx.remaining)
+            try:
+                async with asyncio.TaskGroup() as group:
+                    for _ in range(ctx.workers):
+                        group.create_task(self._worker(ctx))
+            except* _FailFast as failures:
+                # in-flight nodes were cancelled by the TaskGroup; skip what never started
+                failed_id = failures.exceptions[0].args[0]
+                for execution in ctx.executions.values():
+                    if execution.status == STATUS_PENDING:
+                        execution.status = STATUS_FAILED
+                        execution.error = f"Not run: node {failed_id} failed"
+
+        if ctx.deadlocked:
+            blocked = []
+            for node_id, execution in ctx.executions.items():
+                missing_deps = set(execution.depends_on) - ctx.completed
+                if node_id not in ctx.completed and missing_deps:
+                    blocked.append((node_id, missing_deps))
+            error_msg = "\nDeadlock in dependency graph. Blocked nodes:\n"
+            for node_id, deps in blocked:
+                error_msg += f"- {node_id}: waiting for {deps}\n"
+            raise Exception(error_msg)
 
         return {
             node_id: {
-                'status': exec.status.value,
+                'status': exec.status,
                 'result': exec.result,
                 'error': exec.error,
                 'retries': exec.retries
             }
-            for node_id, exec in self.executions.items()
+            for node_id, exec in ctx.executions.items()
         }
 
-    async def _execute_node(self, node_id: str, node_def: Dict, initial_inputs: Dict, results: Dict) -> Any:
-        execution = self.executions[node_id]
+    async def _worker(self, ctx: RunContext):
+        # under an eager task factory the worker would run inside create_task; yield first so
+        # a synchronous fail_fast failure cannot shut the group down before all workers exist
+        await asyncio.sleep(0)
+        while True:
+            node_id = await ctx.ready.get()
+            if node_id is None:
+                return
+            execution = ctx.executions[node_id]
+            node_def = ctx.node_map[node_id]
+            # results only hold outputs of completed nodes
+            dep_view = {dep_id: ctx.results[dep_id] for dep_id in execution.depends_on if dep_id in ctx.results}
+            input_data = ChainMap(node_def.get('params', {}), dep_view, ctx.initial_inputs)
+            ctx.active += 1
+            await self._try_execute_node(ctx, node_id, input_data)
+            ctx.active -= 1
+            if execution.status == STATUS_COMPLETED:
+                ctx.results[node_id] = execution.result
+            elif ctx.fail_fast:
+                raise _FailFast(node_id)
+            ctx.completed.add(node_id)
+            ctx.remaining -= 1
+            for succ_id in ctx.successors.get(node_id, ()):
+                ctx.in_degree[succ_id] -= 1
+                if ctx.in_degree[succ_id] == 0:
+                    ctx.ready.put_nowait(succ_id)
+            if ctx.remaining and ctx.ready.empty() and not ctx.active:
+                ctx.deadlocked = True
+            if not ctx.remaining or ctx.deadlocked:
+                # wake every idle worker so the pool shuts down
+                for _ in range(ctx.workers):
+                    ctx.ready.put_nowait(None)
+
+    async def _try_execute_node(self, ctx: RunContext, node_id: str, input_data: ChainMap):
+        # failures are recorded on the NodeExecution; raising here would abort the worker pool
+        try:
+            await self._execute_node(ctx, node_id, input_data)
+        except Exception:
+            pass
+
+    async def _call_agent(self, node_id: str, agent_type: str, agent: AgentWrapper, input_data: ChainMap) -> Any:
+        if self._profile is None:
+            return await agent.run(input_data, timeout=self.timeout)
+        started = time.perf_counter()
+        try:
+            return await agent.run(input_data, timeout=self.timeout)
+        finally:
+            self._report_timing(node_id, agent_type, time.perf_counter() - started)
+
+    def _report_timing(self, node_id: str, agent_type: str, seconds: float):
+        # a broken profiler must not fail the node or trigger a retry of the agent
+        try:
+            self._profile(node_id, agent_type, seconds)
+        except Exception:
+            logger.exception("Profile hook failed for node %s", node_id)
+
+    async def _execute_node(self, ctx: RunContext, node_id: str, input_data: ChainMap) -> Any:
+        execution = ctx.executions[node_id]
+        node_def = ctx.node_map[node_id]
         last_error = None
-        
+
         for attempt in range(self.max_retries + 1):
             try:
-                execution.status = NodeStatus.RUNNING
+                execution.status = STATUS_RUNNING
                 execution.retries = attempt
 
                 agent_type = node_def.get('agent')
@@ -131,35 +261,42 @@ class Orchestrator:
                 if agent_type not in self.agents:
                     raise ValueError(f"Agent type '{agent_type}' not found in registered agents. Available agents: {list(self.agents.keys())}")
 
-                input_data = initial_inputs.copy()
-                for dep_id in execution.depends_on:
-                    if dep_id in results:
-                        if isinstance(results[dep_id], dict) and 'result' in results[dep_id]:
-                            input_data[dep_id] = results[dep_id]['result']
-                        else:
-                            input_data[dep_id] = results[dep_id]
-
-                params = node_def.get('params', {})
-                input_data.update(params)
-                print(f"Input data: {input_data}")
+                logger.debug("Input data for node %s: %r", node_id, input_data)
 
                 agent = self.agents[agent_type]
-                result = await agent.run(input_data, timeout=self.timeout)
-                execution.status = NodeStatus.COMPLETED
+                key = None
+                if node_def.get('memoize', True) and getattr(agent.agent, 'memoize', True):
+                    key = self._memo_key(agent_type, input_data)
+                if key is not None and key in self._memo:
+                    self._memo.move_to_end(key)
+                    # hand out copies so callers mutating a result cannot change the cached entry
+                    result = copy.deepcopy(self._memo[key])
+                else:
+                    # ChainMap writes land in the first map; give each attempt its own so agents
+                    # never write into the node's params or leak state into the next retry
+                    result = await self._call_agent(node_id, agent_type, agent, input_data.new_child())
+                    if key is not None and self.memo_size > 0:
+                        self._memo[key] = copy.deepcopy(result)
+                        if len(self._memo) > self.memo_size:
+                            self._memo.popitem(last=False)
+                execution.status = STATUS_COMPLETED
                 execution.result = result
-                return {'result': result, 'node_id': node_id, 'agent_type': agent_type}
+                return result
 
             except asyncio.CancelledError:
-                execution.status = NodeStatus.FAILED
+                execution.status = STATUS_FAILED
                 execution.error = "Node execution was cancelled"
                 raise
 
             except Exception as e:
                 last_error = e
-                if attempt < self.max_retries:
-                    await asyncio.sleep(1 * (attempt + 1))
+                # ValueErrors, raised here or by the agent (and wrapped by AgentWrapper), are
+                # bad inputs that a retry cannot fix
+                retryable = not isinstance(e, ValueError) and not isinstance(e.__cause__, ValueError)
+                if attempt < self.max_retries and retryable:
+                    await asyncio.sleep(self.retry_backoff * 2 ** attempt)
                     continue
-                error_msg = f"Node {node_id} failed after {self.max_retries} retries: {str(e)}"
-                execution.status = NodeStatus.FAILED
+                error_msg = f"Node {node_id} failed after {attempt} retries: {str(e)}"
+                execution.status = STATUS_FAILED
                 execution.error = error_msg
                 raise Exception(error_msg) from last_error
@@ -1,58 +1,75 @@
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 import asyncio
 import time
 
+TERMINAL_STATUSES = ('COMPLETED', 'FAILED', 'CANCELLED')
+
 class InMemoryStorage:
+    # Intended for use from a single event loop: every method is a plain dict
+    # operation with no await inside, so calls cannot interleave and no lock is
+    # needed. A threaded backend would have to add its own locking.
     def __init__(self):
         self._runs: Dict[str, Dict[str, Any]] = {}
-        self._lock = asyncio.Lock()
+        self._done_events: Dict[str, asyncio.Event] = {}
 
     async def create_run(self, run_id: str, spec: Dict[str, Any]):
         now = time.time()
-        async with self._lock:
-            self._runs[run_id] = {
-                'spec': spec,
-                'status': 'PENDING',
-                'nodes': {},
-                'artifacts': {},
-                'created_at': now,
-                'updated_at': now
-            }
+        self._runs[run_id] = {
+            'spec': spec,
+            'status': 'PENDING',
+            'nodes': {},
+            'artifacts': {},
+            'created_at': now,
+            'updated_at': now
+        }
 
     async def set_node_result(self, run_id: str, node_id: str, result: Dict[str, Any]):
-        async with self._lock:
-            run = self._runs.get(run_id)
-            if not run:
-                return
-            run['nodes'][node_id] = result
+        run = self._runs.get(run_id)
+        if not run:
+            return
+        run['nodes'][node_id] = result
 
     async def get_run(self, run_id: str):
-        async with self._lock:
-            return self._runs.get(run_id)
+        return self._runs.get(run_id)
 
     async def set_status(self, run_id: str, status: str):
-        async with self._lock:
-            run = self._runs.get(run_id)
-            if run:
-                run['status'] = status
-                run['updated_at'] = time.time()
+        run = self._runs.get(run_id)
+        if run:
+            run['status'] = status
+            run['updated_at'] = time.time()
+            if status in TERMINAL_STATUSES:
+                self._notify_done(run_id)
 
     async def add_artifact(self, run_id: str, name: str, data: bytes):
-        async with self._lock:
-            run = self._runs.get(run_id)
-            if run:
-                run['artifacts'][name] = data
+        run = self._runs.get(run_id)
+        if run:
+            run['artifacts'][name] = data
 
     async def cancel_run(self, run_id: str) -> bool:
-        async with self._lock:
-            run = self._runs.get(run_id)
-            if not run:
-                return False
-            if run['status'] in ('COMPLETED','FAILED'):
-                return False
-            run['status'] = 'CANCELLED'
-            return True
+        run = self._runs.get(run_id)
+        if not run:
+            return False
+        if run['status'] in ('COMPLETED','FAILED'):
+            return False
+        run['status'] = 'CANCELLED'
+        self._notify_done(run_id)
+        return True
+
+    async def wait_until_done(self, run_id: str, timeout: Optional[float] = None):
+        run = self._runs.get(run_id)
+        if not run or run['status'] in TERMINAL_STATUSES:
+            return run
+        event = self._done_events.setdefault(run_id, asyncio.Event())
+        try:
+            await asyncio.wait_for(event.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        return run
+
+    def _notify_done(self, run_id: str):
+        event = self._done_events.pop(run_id, None)
+        if event:
+            event.set()
 
     async def list_runs(self) -> Dict[str, Dict[str, Any]]:
-        async with self._lock:
-            return self._runs
+        return self._runs
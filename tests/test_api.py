@@ -0,0 +1,86 @@
+from fastapi.testclient import TestClient
+
+from app.main import app
+
+
+def create_run(client, nodes, edges=(), initial_inputs=None):
+    response = client.post('/runs', json={
+        'nodes': nodes,
+        'edges': list(edges),
+        'initial_inputs': initial_inputs or {},
+    })
+    assert response.status_code == 200
+    return response.json()['run_id']
+
+
+def test_results_wider_than_64_bits_are_served():
+    with TestClient(app) as client:
+        run_id = create_run(
+            client,
+            [{'id': 'm', 'agent': 'calculator', 'params': {'parent': 'op', 'values': [2 ** 40] * 3}}],
+            initial_inputs={'op': {'operation': 'multiply'}},
+        )
+        response = client.get(f'/runs/{run_id}/watch', params={'timeout': 5})
+        assert response.status_code == 200
+        assert response.json()['status'] == 'COMPLETED'
+        assert response.json()['results']['m']['result'] == {'result': 2 ** 120}
+        assert client.get(f'/runs/{run_id}').status_code == 200
+        runs = client.get('/runs')
+        assert runs.status_code == 200
+        assert run_id in runs.json()
+
+
+def test_watch_returns_finished_run():
+    with TestClient(app) as client:
+        run_id = create_run(
+            client,
+            [{'id': 'a', 'agent': 'calculator', 'params': {'parent': 'op', 'values': [1, 2]}}],
+            initial_inputs={'op': {'operation': 'add'}},
+        )
+        response = client.get(f'/runs/{run_id}/watch', params={'timeout': 5})
+        assert response.status_code == 200
+        assert response.json()['status'] == 'COMPLETED'
+        assert response.json()['results']['a']['result'] == {'result': 3}
+
+
+def test_watch_unknown_run_is_404():
+    with TestClient(app) as client:
+        assert client.get('/runs/missing/watch', params={'timeout': 0}).status_code == 404
+
+
+def test_watch_timeout_bounds():
+    with TestClient(app) as client:
+        for timeout in (-1, 61):
+            assert client.get('/runs/missing/watch', params={'timeout': timeout}).status_code == 422
+        assert client.get('/runs/missing/watch', params={'timeout': 60}).status_code == 404
+
+
+AGENT_SOURCE = b'''
+from app.agent_base import AgentBase
+
+class Echo(AgentBase):
+    async def run(self, inputs):
+        return {'echo': inputs.get('x')}
+
+agent = Echo()
+'''
+
+
+def register(client, name, source):
+    return client.post('/agents/register', params={'name': name}, files={'python_file': ('agent.py', source)})
+
+
+def test_agent_code_cache_is_bounded_and_skips_invalid_code(monkeypatch):
+    from app import main
+
+    monkeypatch.setattr(main, 'AGENT_CODE_CACHE_SIZE', 2)
+    monkeypatch.setattr(main, '_agent_code_cache', main.OrderedDict())
+    with TestClient(app) as client:
+        assert register(client, 'bad', b'agent = 1').status_code == 400
+        assert not main._agent_code_cache
+        for name in ('echo_a', 'echo_b', 'echo_c'):
+            assert register(client, name, AGENT_SOURCE).status_code == 200
+        assert [name for name, _ in main._agent_code_cache] == ['echo_b', 'echo_c']
+        assert {code.co_filename for code in main._agent_code_cache.values()} == {
+            '<agent:echo_b>', '<agent:echo_c>'
+        }
@@ -0,0 +1,61 @@
+import asyncio
+
+from app.agent_base import AgentBase
+from app.batching import AsyncBatchEngine
+from app.orchestrator import Orchestrator
+
+
+class BatchAgent(AgentBase):
+    batchable = True
+    memoize = False
+
+    def __init__(self):
+        self.batches = []
+
+    async def run(self, inputs):
+        if inputs.get('bad'):
+            raise ValueError('bad input')
+        return {'x': inputs['x'] * 2}
+
+    async def run_batch(self, inputs_list):
+        self.batches.append(len(inputs_list))
+        return await super().run_batch(inputs_list)
+
+
+def test_concurrent_calls_are_coalesced():
+    agent = BatchAgent()
+    agent.batch_size = 4
+    orchestrator = Orchestrator(max_concurrent=10, max_retries=0)
+    orchestrator.register_agent('batch', agent)
+    nodes = [{'id': f'n{i}', 'agent': 'batch', 'params': {'x': i}} for i in range(10)]
+    results = asyncio.run(orchestrator.run(nodes, [], {}))
+    assert [results[f'n{i}']['result'] for i in range(10)] == [{'x': i * 2} for i in range(10)]
+    assert agent.batches == [4, 4, 2]
+
+
+def test_failing_item_does_not_fail_its_batch_siblings():
+    agent = BatchAgent()
+    orchestrator = Orchestrator(max_concurrent=10, max_retries=2, retry_backoff=0)
+    orchestrator.register_agent('batch', agent)
+    nodes = [
+        {'id': 'g', 'agent': 'batch', 'params': {'x': 1}},
+        {'id': 'h', 'agent': 'batch', 'params': {'x': 1, 'bad': True}},
+    ]
+    results = asyncio.run(orchestrator.run(nodes, [], {}))
+    assert results['g']['status'] == 'COMPLETED'
+    assert results['g']['result'] == {'x': 2}
+    assert results['g']['retries'] == 0
+    assert results['h']['status'] == 'FAILED'
+    assert 'bad input' in results['h']['error']
+
+
+def test_batch_level_failure_reaches_every_caller():
+    async def explode(items):
+        raise RuntimeError('batch down')
+
+    async def main():
+        engine = AsyncBatchEngine(explode, batch_size=2)
+        return await asyncio.gather(engine.add_request(1), engine.add_request(2), return_exceptions=True)
+
+    errors = asyncio.run(main())
+    assert [str(e) for e in errors] == ['batch down', 'batch down']
@@ -0,0 +1,89 @@
+import asyncio
+import operator
+from functools import reduce
+
+import pytest
+
+from app.agents.calculator import VECTORIZE_THRESHOLD, Calculator
+
+
+calculator = Calculator()
+LONG = VECTORIZE_THRESHOLD + 8
+
+
+def calculate(operation, values):
+    return calculator._calculate(operation, values)
+
+
+PYTHON_OPS = {
+    'add': sum,
+    'subtract': lambda values: reduce(operator.sub, values),
+    'multiply': lambda values: reduce(operator.mul, values),
+    'divide': lambda values: reduce(operator.truediv, values),
+}
+
+
+@pytest.mark.parametrize('operation', sorted(PYTHON_OPS))
+@pytest.mark.parametrize('values', [
+    list(range(1, LONG)),
+    list(range(-LONG, LONG, 3)[::-1]),
+    [1.5, -2.25, 3.0, 0.1] * (LONG // 4),
+])
+def test_long_lists_match_the_python_path(operation, values):
+    if operation == 'divide' and 0 in values[1:]:
+        pytest.skip('division by zero')
+    expected = PYTHON_OPS[operation](values)
+    result = calculate(operation, values)
+    assert result == expected
+    assert type(result) is type(expected)
+
+
+def test_long_int_add_stays_int():
+    assert calculate('add', list(range(1, 10))) == 45
+    result = calculate('add', list(range(1, LONG)))
+    assert result == sum(range(1, LONG))
+    assert type(result) is int
+
+
+def test_long_float_add_matches_builtin_sum():
+    values = [0.1] * LONG
+    assert calculate('add', values) == sum(values)
+
+
+def test_long_float_lists_use_float_results():
+    assert calculate('add', [1.5] * LONG) == 1.5 * LONG
+    assert calculate('subtract', [0.5] * LONG) == 0.5 - 0.5 * (LONG - 1)
+
+
+def test_huge_ints_keep_exact_results():
+    values = [2 ** 70] * LONG
+    assert calculate('multiply', values) == 2 ** (70 * LONG)
+    assert calculate('add', values) == LONG * 2 ** 70
+    big = [2 ** 53 + 1] + [1] * (LONG - 1)
+    assert calculate('add', big) == 2 ** 53 + LONG
+
+
+def test_mixed_int_and_float_falls_back_to_python():
+    values = [2 ** 60] + [0.5] * (LONG - 1)
+    assert calculate('add', values) == sum(values)
+
+
+def test_long_divide_by_zero_raises():
+    with pytest.raises(ValueError, match='Division by zero'):
+        calculate('divide', [1] + [0] * LONG)
+
+
+def test_unsupported_operation_raises():
+    with pytest.raises(ValueError, match='Unsupported operation'):
+        calculate('pow', [1] * LONG)
+
+
+def test_run_resolves_references_to_other_inputs():
+    inputs = {
+        'parent': 'p',
+        'p': {'operation': 'add'},
+        'a': {'result': 10},
+        'b': 3,
+        'values': ['a', 'b', 4],
+    }
+    assert asyncio.run(calculator.run(inputs)) == {'result': 17}
@@ -0,0 +1,64 @@
+import asyncio
+
+import httpx
+import pytest
+
+from app.agents import data_fetcher
+from app.agents.data_fetcher import DataFetcher
+from app.orchestrator import Orchestrator
+
+
+def handler(request):
+    if request.url.host == 'down.test':
+        raise httpx.ConnectError('connection refused', request=request)
+    return httpx.Response(200, text=f'  body of {request.url.path}  ')
+
+
+def mock_client():
+    return httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+
+def fetch(inputs, client=None):
+    async def main():
+        if client is not None:
+            return await DataFetcher(client=client()).run(inputs)
+        return await DataFetcher().run(inputs)
+
+    return asyncio.run(main())
+
+
+def test_fetches_single_url():
+    assert fetch({'url': 'http://up.test/a'}, mock_client) == {'status_code': 200, 'operation': 'body of /a'}
+
+
+def test_fetches_urls_and_reports_failures_per_url():
+    result = fetch({'urls': ['http://up.test/a', 'http://down.test/b', 'http://up.test/c']}, mock_client)
+    assert result['status_codes'] == [200, None, 200]
+    assert result['texts'] == ['body of /a', None, 'body of /c']
+    assert result['errors'][0] is None and result['errors'][2] is None
+    assert 'connection refused' in result['errors'][1]
+
+
+def test_max_bytes_caps_response_size():
+    with pytest.raises(ValueError, match='exceeds 4 bytes'):
+        fetch({'url': 'http://up.test/a', 'max_bytes': 4}, mock_client)
+    result = fetch({'urls': ['http://up.test/a'], 'max_bytes': 4}, mock_client)
+    assert 'exceeds 4 bytes' in result['errors'][0]
+
+
+def test_max_bytes_overflow_fails_node_without_retry():
+    orchestrator = Orchestrator(max_retries=2, retry_backoff=0)
+    orchestrator.register_agent('fetch', DataFetcher(client=mock_client()))
+    nodes = [{'id': 'a', 'agent': 'fetch', 'params': {'url': 'http://up.test/a', 'max_bytes': 4}}]
+    results = asyncio.run(orchestrator.run(nodes, [], {}))
+    assert results['a']['status'] == 'FAILED'
+    assert results['a']['retries'] == 0
+
+
+def test_works_without_a_shared_client(monkeypatch):
+    real_client = httpx.AsyncClient
+    monkeypatch.setattr(
+        data_fetcher.httpx, 'AsyncClient',
+        lambda **kwargs: real_client(transport=httpx.MockTransport(handler), **kwargs)
+    )
+    assert fetch({'url': 'http://up.test/a'}) == {'status_code': 200, 'operation': 'body of /a'}
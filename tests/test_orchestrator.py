@@ -0,0 +1,307 @@
+import asyncio
+import time
+
+import pytest
+
+from app.agent_base import AgentBase
+from app.orchestrator import Orchestrator
+
+
+class SleepAgent(AgentBase):
+    memoize = False
+
+    async def run(self, inputs):
+        await asyncio.sleep(inputs.get('delay', 0))
+        if inputs.get('fail'):
+            raise RuntimeError('boom')
+        return {'seen': sorted(k for k in inputs if k.startswith('n'))}
+
+
+class FlakyAgent(AgentBase):
+    memoize = False
+
+    def __init__(self, failures):
+        self.failures = failures
+        self.calls = 0
+
+    async def run(self, inputs):
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise RuntimeError('transient')
+        return {'calls': self.calls}
+
+
+def make_orchestrator(**kwargs):
+    kwargs.setdefault('max_retries', 0)
+    kwargs.setdefault('retry_backoff', 0)
+    orchestrator = Orchestrator(**kwargs)
+    orchestrator.register_agent('sleep', SleepAgent())
+    return orchestrator
+
+
+def node(node_id, agent='sleep', **params):
+    return {'id': node_id, 'agent': agent, 'params': params}
+
+
+def edge(src, dst):
+    return {'from_': src, 'to': dst}
+
+
+def test_diamond_passes_dependency_results():
+    nodes = [node('n1'), node('n2'), node('n3'), node('n4')]
+    edges = [edge('n1', 'n2'), edge('n1', 'n3'), edge('n2', 'n4'), edge('n3', 'n4')]
+    results = asyncio.run(make_orchestrator().run(nodes, edges, {}))
+    assert all(r['status'] == 'COMPLETED' for r in results.values())
+    assert results['n2']['result'] == {'seen': ['n1']}
+    assert results['n4']['result'] == {'seen': ['n2', 'n3']}
+
+
+def test_fast_node_unblocks_downstream_without_waiting_for_siblings():
+    # fast -> child runs alongside slow; a wave scheduler would take slow + child
+    nodes = [node('fast', delay=0.05), node('slow', delay=0.3), node('child', delay=0.2)]
+    edges = [edge('fast', 'child')]
+    started = time.perf_counter()
+    results = asyncio.run(make_orchestrator().run(nodes, edges, {}))
+    elapsed = time.perf_counter() - started
+    assert all(r['status'] == 'COMPLETED' for r in results.values())
+    assert elapsed < 0.45
+
+
+def test_max_concurrent_bounds_running_agents():
+    class CountingAgent(AgentBase):
+        memoize = False
+        running = peak = 0
+
+        async def run(self, inputs):
+            CountingAgent.running += 1
+            CountingAgent.peak = max(CountingAgent.peak, CountingAgent.running)
+            await asyncio.sleep(0.01)
+            CountingAgent.running -= 1
+            return {}
+
+    orchestrator = Orchestrator(max_concurrent=2)
+    orchestrator.register_agent('count', CountingAgent())
+    asyncio.run(orchestrator.run([node(f'n{i}', 'count') for i in range(10)], [], {}))
+    assert CountingAgent.peak == 2
+
+
+def test_deadlock_reported_after_partial_progress():
+    nodes = [node('a'), node('b'), node('c')]
+    edges = [edge('a', 'b'), edge('b', 'c'), edge('c', 'b')]
+    orchestrator = make_orchestrator()
+    try:
+        asyncio.run(orchestrator.run(nodes, edges, {}))
+    except Exception as e:
+        message = str(e)
+    else:
+        raise AssertionError('expected a deadlock')
+    assert 'Deadlock in dependency graph' in message
+    assert "- b: waiting for {'c'}" in message
+    assert "- c: waiting for {'b'}" in message
+    assert '- a:' not in message
+
+
+def test_unknown_dependency_is_a_deadlock():
+    try:
+        asyncio.run(make_orchestrator().run([node('a')], [edge('missing', 'a')], {}))
+    except Exception as e:
+        assert "- a: waiting for {'missing'}" in str(e)
+    else:
+        raise AssertionError('expected a deadlock')
+
+
+def test_failure_without_fail_fast_keeps_running_other_nodes():
+    nodes = [node('bad', fail=True), node('child'), node('other')]
+    results = asyncio.run(make_orchestrator().run(nodes, [edge('bad', 'child')], {}))
+    assert results['bad']['status'] == 'FAILED'
+    assert results['child']['status'] == 'COMPLETED'
+    assert results['other']['status'] == 'COMPLETED'
+
+
+def test_fail_fast_cancels_in_flight_and_skips_pending():
+    nodes = [node('bad', fail=True, delay=0.02), node('slow', delay=1), node('child'), node('later')]
+    orchestrator = make_orchestrator(max_concurrent=2)
+    started = time.perf_counter()
+    results = asyncio.run(orchestrator.run(nodes, [edge('bad', 'child')], {}, fail_fast=True))
+    assert time.perf_counter() - started < 0.5
+    assert results['bad']['status'] == 'FAILED'
+    assert results['slow'] == {
+        'status': 'FAILED', 'result': None, 'error': 'Node execution was cancelled', 'retries': 0
+    }
+    for node_id in ('child', 'later'):
+        assert results[node_id]['status'] == 'FAILED'
+        assert results[node_id]['error'] == 'Not run: node bad failed'
+
+
+@pytest.mark.skipif(not hasattr(asyncio, 'eager_task_factory'), reason='needs Python 3.12+')
+def test_fail_fast_with_eager_tasks_and_synchronous_failure():
+    async def main():
+        asyncio.get_running_loop().set_task_factory(asyncio.eager_task_factory)
+        orchestrator = make_orchestrator(max_concurrent=3)
+        orchestrator.register_agent('flaky', FlakyAgent(failures=1))
+        nodes = [node('bad', 'flaky'), node('a', delay=1), node('b', delay=1)]
+        return await orchestrator.run(nodes, [], {}, fail_fast=True)
+
+    results = asyncio.run(main())
+    assert results['bad']['status'] == 'FAILED'
+    assert {results[node_id]['status'] for node_id in ('a', 'b')} == {'FAILED'}
+
+
+def test_retries_until_success():
+    orchestrator = Orchestrator(max_retries=2, retry_backoff=0)
+    agent = FlakyAgent(failures=2)
+    orchestrator.register_agent('flaky', agent)
+    results = asyncio.run(orchestrator.run([node('a', 'flaky')], [], {}))
+    assert results['a']['status'] == 'COMPLETED'
+    assert results['a']['retries'] == 2
+    assert agent.calls == 3
+
+
+def test_retry_count_reported_on_failure():
+    orchestrator = Orchestrator(max_retries=2, retry_backoff=0)
+    agent = FlakyAgent(failures=10)
+    orchestrator.register_agent('flaky', agent)
+    results = asyncio.run(orchestrator.run([node('a', 'flaky')], [], {}))
+    assert results['a']['status'] == 'FAILED'
+    assert results['a']['retries'] == 2
+    assert results['a']['error'].startswith('Node a failed after 2 retries')
+    assert agent.calls == 3
+
+
+def test_unknown_agent_type_is_not_retried():
+    orchestrator = Orchestrator(max_retries=2, retry_backoff=0)
+    results = asyncio.run(orchestrator.run([node('a', 'nope')], [], {}))
+    assert results['a']['status'] == 'FAILED'
+    assert results['a']['retries'] == 0
+
+
+def test_agent_value_error_is_not_retried():
+    from app.agents.calculator import agent as calculator
+
+    orchestrator = Orchestrator(max_retries=2, retry_backoff=0)
+    orchestrator.register_agent('calculator', calculator)
+    nodes = [node('a', 'calculator', parent='op', values=[1, 0])]
+    results = asyncio.run(orchestrator.run(nodes, [], {'op': {'operation': 'divide'}}))
+    assert results['a']['status'] == 'FAILED'
+    assert results['a']['retries'] == 0
+    assert 'Division by zero' in results['a']['error']
+
+
+def test_agent_writes_do_not_reach_params_or_later_attempts():
+    class CountingWriter(AgentBase):
+        memoize = False
+
+        async def run(self, inputs):
+            inputs['count'] = inputs.get('count', 0) + 1
+            if inputs['count'] < 3:
+                raise RuntimeError(f"saw count {inputs['count']}")
+            return {'count': inputs['count']}
+
+    orchestrator = Orchestrator(max_retries=2, retry_backoff=0)
+    orchestrator.register_agent('writer', CountingWriter())
+    nodes = [node('a', 'writer')]
+    results = asyncio.run(orchestrator.run(nodes, [], {}))
+    assert results['a']['status'] == 'FAILED'
+    assert 'saw count 1' in results['a']['error']
+    assert nodes[0]['params'] == {}
+
+
+def test_profile_hook_reports_each_agent_attempt():
+    calls = []
+    orchestrator = Orchestrator(max_retries=1, retry_backoff=0, profile=lambda *call: calls.append(call))
+    orchestrator.register_agent('sleep', SleepAgent())
+    orchestrator.register_agent('flaky', FlakyAgent(failures=1))
+    nodes = [node('a', delay=0.05), node('b', 'flaky')]
+    results = asyncio.run(orchestrator.run(nodes, [], {}))
+    assert {node_id: r['status'] for node_id, r in results.items()} == {'a': 'COMPLETED', 'b': 'COMPLETED'}
+    assert sorted((node_id, agent_type) for node_id, agent_type, _ in calls) == [
+        ('a', 'sleep'), ('b', 'flaky'), ('b', 'flaky')
+    ]
+    seconds = {node_id: elapsed for node_id, _, elapsed in calls}
+    assert 0.05 <= seconds['a'] < 0.5
+
+
+def test_failing_profile_hook_does_not_fail_the_node():
+    def profile(node_id, agent_type, seconds):
+        raise RuntimeError('profiler broke')
+
+    agent = FlakyAgent(failures=0)
+    orchestrator = Orchestrator(max_retries=2, retry_backoff=0, profile=profile)
+    orchestrator.register_agent('flaky', agent)
+    results = asyncio.run(orchestrator.run([node('a', 'flaky')], [], {}))
+    assert results['a']['status'] == 'COMPLETED'
+    assert results['a']['retries'] == 0
+    assert agent.calls == 1
+
+
+def test_memoized_result_is_reused_across_runs():
+    class CountingAgent(AgentBase):
+        calls = 0
+
+        async def run(self, inputs):
+            CountingAgent.calls += 1
+            return {'calls': CountingAgent.calls}
+
+    orchestrator = Orchestrator()
+    orchestrator.register_agent('count', CountingAgent())
+    first = asyncio.run(orchestrator.run([node('a', 'count', x=1)], [], {}))
+    second = asyncio.run(orchestrator.run([node('a', 'count', x=1)], [], {}))
+    opted_out = asyncio.run(orchestrator.run([dict(node('a', 'count', x=1), memoize=False)], [], {}))
+    assert first['a']['result'] == second['a']['result'] == {'calls': 1}
+    assert opted_out['a']['result'] == {'calls': 2}
+
+
+def test_replacing_an_agent_drops_its_memoized_results():
+    class Version(AgentBase):
+        def __init__(self, version):
+            self.version = version
+
+        async def run(self, inputs):
+            return {'v': self.version}
+
+    orchestrator = Orchestrator()
+    orchestrator.register_agent('x', Version(1))
+    orchestrator.register_agent('y', Version(3))
+    nodes = [node('a', 'x'), node('b', 'y')]
+    assert asyncio.run(orchestrator.run(nodes, [], {}))['a']['result'] == {'v': 1}
+    orchestrator.register_agent('x', Version(2), replace=True)
+    results = asyncio.run(orchestrator.run(nodes, [], {}))
+    assert results['a']['result'] == {'v': 2}
+    assert results['b']['result'] == {'v': 3}
+    assert len(orchestrator._memo) == 2
+
+
+def test_mutating_a_memoized_result_does_not_change_the_cache():
+    class Source(AgentBase):
+        async def run(self, inputs):
+            return {'items': [1, 2]}
+
+    class Sink(AgentBase):
+        memoize = False
+
+        async def run(self, inputs):
+            inputs['src']['items'].append(99)
+            return {'items': inputs['src']['items']}
+
+    orchestrator = Orchestrator()
+    orchestrator.register_agent('source', Source())
+    orchestrator.register_agent('sink', Sink())
+    nodes = [node('src', 'source'), node('sink', 'sink')]
+    for _ in range(3):
+        results = asyncio.run(orchestrator.run(nodes, [edge('src', 'sink')], {}))
+        assert results['sink']['result'] == {'items': [1, 2, 99]}
+    assert list(orchestrator._memo.values()) == [{'items': [1, 2]}]
+
+
+def test_memo_keeps_non_finite_floats_apart():
+    class Echo(AgentBase):
+        async def run(self, inputs):
+            return {'x': inputs['x']}
+
+    orchestrator = Orchestrator()
+    orchestrator.register_agent('echo', Echo())
+    for value in (float('inf'), float('-inf'), 2 ** 70):
+        results = asyncio.run(orchestrator.run([node('a', 'echo', x=value)], [], {}))
+        assert results['a']['result'] == {'x': value}
+    results = asyncio.run(orchestrator.run([node('a', 'echo', x=float('nan'))], [], {}))
+    assert results['a']['result']['x'] != results['a']['result']['x']
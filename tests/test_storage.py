@@ -0,0 +1,53 @@
+import asyncio
+
+from app.storage import InMemoryStorage
+
+
+def test_wait_returns_terminal_run_immediately():
+    async def main():
+        storage = InMemoryStorage()
+        await storage.create_run('r', {})
+        await storage.set_status('r', 'COMPLETED')
+        return await asyncio.wait_for(storage.wait_until_done('r', timeout=5), 0.5)
+
+    assert asyncio.run(main())['status'] == 'COMPLETED'
+
+
+def test_wait_wakes_on_terminal_set_status():
+    async def main():
+        storage = InMemoryStorage()
+        await storage.create_run('r', {})
+        waiter = asyncio.create_task(storage.wait_until_done('r', timeout=5))
+        await asyncio.sleep(0.01)
+        await storage.set_status('r', 'RUNNING')
+        await asyncio.sleep(0.01)
+        assert not waiter.done()
+        await storage.set_status('r', 'FAILED')
+        return await asyncio.wait_for(waiter, 0.5)
+
+    assert asyncio.run(main())['status'] == 'FAILED'
+
+
+def test_wait_wakes_on_cancel_run():
+    async def main():
+        storage = InMemoryStorage()
+        await storage.create_run('r', {})
+        waiter = asyncio.create_task(storage.wait_until_done('r', timeout=5))
+        await asyncio.sleep(0.01)
+        assert await storage.cancel_run('r')
+        return await asyncio.wait_for(waiter, 0.5)
+
+    assert asyncio.run(main())['status'] == 'CANCELLED'
+
+
+def test_wait_times_out_with_current_run():
+    async def main():
+        storage = InMemoryStorage()
+        await storage.create_run('r', {})
+        return await storage.wait_until_done('r', timeout=0.01)
+
+    assert asyncio.run(main())['status'] == 'PENDING'
+
+
+def test_wait_for_unknown_run_returns_none():
+    assert asyncio.run(InMemoryStorage().wait_until_done('missing', timeout=5)) is None